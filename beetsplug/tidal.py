@@ -3,13 +3,19 @@ Adds Tidal support to the autotagger.
 """
 
 import collections
+import functools
 import json
+import random
 import re
+import sqlite3
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from io import BytesIO
+from html import unescape
 
 import confuse
+import httpx
 import requests
 import tidalapi
 from beets import config, importer, ui
@@ -18,6 +24,20 @@ from beets.dbcore import types
 from beets.library import DateType
 from beets.plugins import BeetsPlugin, get_distance
 from PIL import Image
+from requests.adapters import HTTPAdapter
+from tidalapi.exceptions import TooManyRequests
+
+
+# Strip non-word characters from query. Things like "!" and "-" can cause a
+# query to return no results, even if they match the artist or album title.
+# Use `re.UNICODE` flag to avoid stripping non-english word characters.
+_RE_NONWORD = re.compile(r'\W+', re.UNICODE)
+# Strip medium information from query, Things like "CD1" and "disk 1" can
+# also negate an otherwise positive result.
+_RE_MEDIUM = re.compile(r'\b(CD|disc)\s*\d+', re.IGNORECASE)
+
+# Number of concurrent track lookups made by `tidalsync`.
+_POPULARITY_CONCURRENCY = 16
 
 
 def extend_reimport_fresh_fields_item():
@@ -30,6 +50,167 @@ def extend_reimport_fresh_fields_item():
         'tidal_updated'])
 
 
+def _normalize_query(query):
+    """Clean up a search query so that it matches as many results as
+    possible.
+    """
+    return _RE_MEDIUM.sub('', _RE_NONWORD.sub(' ', query))
+
+
+def _decode(s):
+    """Decode HTML entities such as `&quot;` that Tidal leaves in names."""
+    return unescape(s) if s and '&' in s else s
+
+
+def _looks_like_image(prefix):
+    """Return whether `prefix`, the start of a file, has the signature of
+    an image format that PIL can open.
+
+    Only the signature is checked, since a prefix of a few KB is often not
+    enough for PIL to parse the whole header (e.g. JPEGs with large EXIF or
+    ICC segments).
+    """
+    Image.init()
+    return any(accept and accept(prefix[:16])
+               for _, accept in Image.OPEN.values())
+
+
+def _is_throttled(exc):
+    """Return whether `exc` means Tidal is asking us to slow down: a 429
+    (which tidalapi raises as TooManyRequests) or a 5xx HTTP error.
+
+    tidalapi may replace the HTTPError of a 5xx with another exception,
+    e.g. when it fails to parse an HTML error page as JSON, so the chain of
+    causes is searched as well.
+    """
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        seen.add(id(exc))
+        if isinstance(exc, TooManyRequests):
+            return True
+        response = getattr(exc, 'response', None)
+        if (isinstance(exc, requests.HTTPError) and response is not None
+                and response.status_code >= 500):
+            return True
+        exc = exc.__cause__ or exc.__context__
+    return False
+
+
+class TrackRecord(collections.namedtuple('TrackRecord', [
+        'id', 'name', 'duration', 'artist_id', 'artist_name', 'album_name',
+        'isrc', 'popularity', 'fetched'])):
+    """The fields of a Tidal track that the plugin uses, and the time they
+    were fetched from Tidal.
+
+    Unlike tidalapi objects, records hold no reference to the API session,
+    so they are small to keep in memory and cheap to serialise.
+    """
+    __slots__ = ()
+
+    def to_dict(self):
+        """Return the fields to cache; the fetch time is stored apart."""
+        data = self._asdict()
+        del data['fetched']
+        return data
+
+    @classmethod
+    def from_dict(cls, data, fetched):
+        return cls(fetched=fetched, **data)
+
+
+class AlbumRecord(collections.namedtuple('AlbumRecord', [
+        'id', 'name', 'artist_id', 'artist_name', 'year', 'month', 'day',
+        'popularity', 'explicit', 'isrc', 'copyright', 'image_url',
+        'tracks', 'fetched'])):
+    """The fields of a Tidal album that the plugin uses, along with a
+    tuple of TrackRecords for its tracks, and the time they were fetched
+    from Tidal.
+    """
+    __slots__ = ()
+
+    def to_dict(self):
+        """Return the fields to cache; the fetch time is stored apart."""
+        data = self._asdict()
+        del data['fetched']
+        data['tracks'] = [track.to_dict() for track in self.tracks]
+        return data
+
+    @classmethod
+    def from_dict(cls, data, fetched):
+        tracks = tuple(TrackRecord.from_dict(track, fetched)
+                       for track in data['tracks'])
+        return cls(fetched=fetched, **dict(data, tracks=tracks))
+
+
+class MetadataCache:
+    """A persistent store of Tidal metadata records keyed on Tidal ID.
+
+    Records are plain JSON-serialisable dicts stored along with the time
+    they were fetched, and expire after `ttl` seconds. Writes are buffered
+    and committed together, once `flush_size` records are pending or when
+    `flush` is called.
+    """
+
+    def __init__(self, path, ttl, flush_size=256):
+        self.ttl = ttl
+        self.flush_size = flush_size
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        # This is only a cache, so trade durability for fewer fsyncs.
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        with self._db:
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS metadata ('
+                'kind TEXT, id TEXT, fetched REAL, data TEXT, '
+                'PRIMARY KEY (kind, id))')
+            # Drop expired records so the file doesn't grow without bound.
+            self._db.execute('DELETE FROM metadata WHERE fetched <= ?',
+                             (time.time() - ttl,))
+
+    def get(self, kind, key):
+        """Return a `(record, fetched)` pair for `key`, or None if the
+        record is missing or expired.
+        """
+        with self._lock:
+            row = self._pending.get((kind, key))
+            if row is None:
+                row = self._db.execute(
+                    'SELECT fetched, data FROM metadata '
+                    'WHERE kind = ? AND id = ?', (kind, key)).fetchone()
+        if row is None or row[0] <= time.time() - self.ttl:
+            return None
+        return json.loads(row[1]), row[0]
+
+    def set(self, kind, key, record, fetched):
+        row = (fetched, json.dumps(record))
+        with self._lock:
+            self._pending[(kind, key)] = row
+            if len(self._pending) >= self.flush_size:
+                self._flush()
+
+    def flush(self):
+        """Commit all pending writes in a single transaction."""
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        if not self._pending:
+            return
+        with self._db:
+            self._db.executemany(
+                'INSERT OR REPLACE INTO metadata VALUES (?, ?, ?, ?)',
+                [(kind, key, fetched, data) for (kind, key), (fetched, data)
+                 in self._pending.items()])
+        self._pending.clear()
+
+    def close(self):
+        with self._lock:
+            self._flush()
+            self._db.close()
+
+
 class TidalPlugin(BeetsPlugin):
     data_source = 'Tidal'
 
@@ -54,19 +235,103 @@ class TidalPlugin(BeetsPlugin):
         config['tidal'].add({
             'tidal_attempts': 5,
             'tidal_sleep_interval': [5, 30],
-            'tidal_session_file': 'tidal.json'})
-
-        sessionfile = config["tidal"]["tidal_session_file"].get(
-            confuse.Filename(in_app_dir=True))
-
-        self.session = self.load_session(sessionfile)
-
-        if not self.session:
-            self._log.debug("JSON file corrupted or does not exist, \
-                            performing simple OAuth login.")
-            self.session = tidalapi.Session()
-            self.session.login_oauth_simple()
-            self.save_session(sessionfile)
+            'tidal_session_file': 'tidal.json',
+            'tidal_cache_file': 'tidal_cache.db',
+            'tidal_cache_ttl': 7 * 24 * 60 * 60})
+
+        # Logging in may require an interactive OAuth flow, and the HTTP
+        # client and metadata cache hold connections and files, so create
+        # them only once a command actually needs to talk to Tidal.
+        self.session = None
+        self._session_lock = threading.Lock()
+        self._login_error = None
+        self._http = None
+        self._cache = None
+        self._resource_lock = threading.Lock()
+
+        # Album and track metadata is cached on disk across runs and in
+        # memory within a run.
+        self._track_cache = functools.lru_cache(maxsize=4096)(
+            self._fetch_track)
+        self._album_cache = functools.lru_cache(maxsize=4096)(
+            self._fetch_album)
+        # beets often repeats the same search during interactive tagging.
+        self._search_album = functools.lru_cache(maxsize=512)(
+            self._search_album_uncached)
+        self._search_track = functools.lru_cache(maxsize=512)(
+            self._search_track_uncached)
+        self._validate_image = functools.lru_cache(maxsize=2048)(
+            self._validate_image_uncached)
+        self.register_listener('cli_exit', self.shutdown)
+
+    def shutdown(self, lib=None):
+        """Release the shared HTTP client and the metadata cache."""
+        if self._http is not None:
+            self._http.close()
+        if self._cache is not None:
+            self._cache.close()
+
+    def _http_client(self):
+        """Return the shared HTTP client, creating it on first use."""
+        with self._resource_lock:
+            if self._http is None:
+                # HTTP/2 lets requests to Tidal's image CDN share pooled
+                # keep-alive connections instead of paying for a new TLS
+                # handshake each time.
+                self._http = httpx.Client(
+                    transport=httpx.HTTPTransport(
+                        http2=True, retries=2,
+                        limits=httpx.Limits(max_connections=16,
+                                            max_keepalive_connections=8)),
+                    timeout=5.0)
+            return self._http
+
+    def _metadata_cache(self):
+        """Return the on-disk metadata cache, opening it on first use."""
+        with self._resource_lock:
+            if self._cache is None:
+                cachefile = config["tidal"]["tidal_cache_file"].get(
+                    confuse.Filename(in_app_dir=True))
+                self._cache = MetadataCache(
+                    cachefile, config["tidal"]["tidal_cache_ttl"].get(int))
+            return self._cache
+
+    def _ensure_session(self):
+        """Load the saved Tidal session, or log in, on first use.
+
+        Raises a UserError if logging in fails. The failure is remembered,
+        so later lookups fail straight away instead of prompting again.
+        """
+        if self.session is not None:
+            return
+        with self._session_lock:
+            if self.session is not None:
+                return
+            if self._login_error is not None:
+                raise ui.UserError(
+                    f'Could not log in to Tidal: {self._login_error}')
+            sessionfile = config["tidal"]["tidal_session_file"].get(
+                confuse.Filename(in_app_dir=True))
+
+            session = self.load_session(sessionfile)
+            saved = session is not None
+
+            if not saved:
+                self._log.debug("JSON file corrupted or does not exist, \
+                                performing simple OAuth login.")
+                session = tidalapi.Session()
+                try:
+                    session.login_oauth_simple()
+                except Exception as e:
+                    self._login_error = e
+                    raise ui.UserError(f'Could not log in to Tidal: {e}')
+            # Keep one pooled connection per concurrent lookup; requests only
+            # keeps 10 by default.
+            session.request_session.mount('https://', HTTPAdapter(
+                pool_maxsize=_POPULARITY_CONCURRENCY))
+            self.session = session
+            if not saved:
+                self.save_session(sessionfile)
 
     def load_session(self, sfile):
         self._log.debug(f"Loading tidal session from {sfile}")
@@ -82,7 +347,7 @@ class TidalPlugin(BeetsPlugin):
                     return s
                 else:
                     return None
-        except FileNotFoundError:
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
             return None
 
     def save_session(self, sfile):
@@ -107,49 +372,141 @@ class TidalPlugin(BeetsPlugin):
 
         def func(lib, opts, args):
             items = lib.items(ui.decargs(args))
-            self.tidalsync(items, ui.should_write(), opts.force_refetch)
+            self.tidalsync(lib, items, ui.should_write(), opts.force_refetch)
 
         tidalsync_cmd.func = func
         return [tidalsync_cmd]
 
-    def tidalsync(self, items, write, force):
+    def tidalsync(self, lib, items, write, force):
         """Obtain track information from Tidal."""
-        self._log.debug('Total {} tracks', len(items))
-
-        for index, item in enumerate(items, start=1):
-            self._log.info('Processing {}/{} tracks - {} ',
-                           index, len(items), item)
-            # If we're not forcing re-downloading for all tracks, check
-            # whether the popularity data is already present
-            if not force:
-                if 'tidal_track_popularity' in item:
-                    self._log.debug('Popularity already present for: {}',
-                                    item)
+        # Unless we're forcing re-downloading for all tracks, skip tracks
+        # whose popularity data is already present. Tracks without a Tidal
+        # track ID can't be looked up at all.
+        todo = [(item, item.tidal_track_id) for item in items
+                if getattr(item, 'tidal_track_id', None)
+                and (force or 'tidal_track_popularity' not in item)]
+        self._log.info('Fetching popularity for {}/{} tracks',
+                       len(todo), len(items))
+        if not todo:
+            return
+
+        # Log in here rather than from one of the lookup threads, so that an
+        # interactive OAuth login happens once and a failure stops the sync.
+        self._ensure_session()
+
+        records = self._lookup_tracks(
+            {tidal_track_id for _, tidal_track_id in todo}, refresh=force)
+        updated = []
+        # Commit all database updates at once rather than once per item.
+        with lib.transaction():
+            for item, tidal_track_id in todo:
+                record = records.get(tidal_track_id)
+                if record is None:
                     continue
-            try:
-                tidal_track_id = item.tidal_track_id
-            except AttributeError:
-                self._log.debug('No track_id present for: {}', item)
-                continue
-
-            popularity = self.track_popularity(tidal_track_id)
-            item['tidal_track_popularity'] = popularity
-            item['spotify_updated'] = time.time()
-            item.store()
-            if write:
-                item.try_write()
-
-    def track_popularity(self, track_id):
-        """Fetch a track popularity by its Tidal ID."""
+                item['tidal_track_popularity'] = record.popularity
+                item['tidal_updated'] = record.fetched
+                item.store()
+                updated.append(item)
+        if write:
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                list(pool.map(lambda item: item.try_write(), updated))
+
+    def _lookup_tracks(self, track_ids,
+                       concurrency=_POPULARITY_CONCURRENCY, refresh=False):
+        """Look up many tracks concurrently.
+
+        Returns a dict mapping each track ID to its TrackRecord; tracks that
+        could not be looked up are left out. With `refresh`, the metadata
+        cache is bypassed and updated with the fresh data. Lookups run
+        in waves of up to `concurrency` requests; whenever Tidal throttles
+        us (HTTP 429 or 5xx) the wave size is halved and the affected IDs
+        are retried after sleeping for `tidal_sleep_interval` seconds, or
+        longer if Tidal asked for it with Retry-After, up to
+        `tidal_attempts` times in a row. Each wave that goes through
+        without throttling grows the wave size by one again.
+        """
+        attempts = config['tidal']['tidal_attempts'].get(int)
+        sleep_min, sleep_max = config['tidal']['tidal_sleep_interval'].get()
+        pending = list(track_ids)
+        records = {}
+        failures = 0
+        max_concurrency = concurrency
+        with ThreadPoolExecutor(max_workers=max_concurrency) as pool:
+            while pending:
+                wave, pending = pending[:concurrency], pending[concurrency:]
+                futures = [(track_id, pool.submit(self._lookup_track,
+                                                  track_id, refresh))
+                           for track_id in wave]
+                throttled = []
+                retry_after = -1
+                for track_id, future in futures:
+                    try:
+                        record = future.result()
+                    except Exception as e:
+                        if not _is_throttled(e):
+                            raise
+                        throttled.append(track_id)
+                        retry_after = max(retry_after,
+                                          getattr(e, 'retry_after', -1))
+                        continue
+                    if record is not None:
+                        records[track_id] = record
+                if not throttled:
+                    failures = 0
+                    concurrency = min(max_concurrency, concurrency + 1)
+                    continue
+                failures += 1
+                if failures >= attempts:
+                    self._log.warning(
+                        'Tidal is still throttling after {} attempts, '
+                        'skipping {} tracks', attempts,
+                        len(throttled) + len(pending))
+                    break
+                concurrency = max(1, concurrency // 2)
+                delay = max(random.uniform(sleep_min, sleep_max),
+                            retry_after)
+                self._log.debug('Tidal is throttling requests, retrying with '
+                                '{} workers in {:.0f}s', concurrency, delay)
+                time.sleep(delay)
+                pending = throttled + pending
+        if self._cache is not None:
+            self._cache.flush()
+        return records
+
+    def track_popularity(self, track_id, refresh=False):
+        """Fetch a track popularity by its Tidal ID.
+
+        Returns None if the track can't be looked up. See `_lookup_track`.
+        """
+        track_data = self._lookup_track(track_id, refresh)
+        if track_data is None:
+            return None
+        popularity = track_data.popularity
+        self._log.debug('Popularity of {} is {}', track_id, popularity)
+        return popularity
+
+    def _lookup_track(self, track_id, refresh=False):
+        """Return the TrackRecord for a Tidal track ID, or None if the track
+        can't be looked up.
+
+        Unless `refresh` is set, tracks already in the metadata cache are
+        answered without an API call. Throttling errors (HTTP 429 or 5xx)
+        are re-raised so that callers can back off and retry.
+        """
         try:
-            track_data = self.session.track(id)
+            if refresh:
+                track_data = self._fetch_track(str(track_id), refresh=True)
+            else:
+                track_data = self._cached_track(track_id)
+        except ui.UserError:
+            raise
         except Exception as e:
+            if _is_throttled(e):
+                raise
             self._log.debug('Track not found: {}. Error: {}',
                             track_id, format(e))
             return None
-        popularity = track_data.popularity
-        self._log.debug('Popularity of {} is {}', track_id, popularity)
-        return popularity
+        return track_data
 
     def album_distance(self, items, album_info, mapping):
 
@@ -171,26 +528,33 @@ class TidalPlugin(BeetsPlugin):
             config=self.config
         )
 
+    def _search_album_uncached(self, query):
+        """Return the top album hit for a normalized query, or None."""
+        self._ensure_session()
+        data = self.session.search(query, models=[tidalapi.album.Album])
+        return data.get('top_hit')
+
+    def _search_track_uncached(self, query):
+        """Return the top track hit for a normalized query, or None."""
+        self._ensure_session()
+        data = self.session.search(query, models=[tidalapi.media.Track])
+        return data.get('top_hit')
+
     def get_albums(self, query):
         """Returns a list of AlbumInfo objects for a Tidal search query.
         """
-        # Strip non-word characters from query. Things like "!" and "-" can
-        # cause a query to return no results, even if they match the artist or
-        # album title. Use `re.UNICODE` flag to avoid stripping non-english
-        # word characters.
-        query = re.sub(r'(?u)\W+', ' ', query)
-        # Strip medium information from query, Things like "CD1" and "disk 1"
-        # can also negate an otherwise positive result.
-        query = re.sub(r'(?i)\b(CD|disc)\s*\d+', '', query)
+        query = _normalize_query(query)
         albums = []
         self._log.debug('Searching Tidal for: {}', query)
         try:
-            data = self.session.search(query, models=[tidalapi.album.Album])
+            top_hit = self._search_album(query)
+        except ui.UserError:
+            raise
         except Exception as e:
             self._log.debug('Invalid Search Error: {}'.format(e))
-        if data.get('top_hit'):
-            id = data.get('top_hit').id
-            album_details = self.session.album(id)
+            return albums
+        if top_hit:
+            album_details = self._cached_album(top_hit.id)
             album_info = self.get_album_info(album_details)
             albums.append(album_info)
         return albums
@@ -198,23 +562,18 @@ class TidalPlugin(BeetsPlugin):
     def get_tracks(self, query):
         """Returns a list of TrackInfo objects for a Tidal search query.
         """
-        # Strip non-word characters from query. Things like "!" and "-" can
-        # cause a query to return no results, even if they match the artist or
-        # album title. Use `re.UNICODE` flag to avoid stripping non-english
-        # word characters.
-        query = re.sub(r'(?u)\W+', ' ', query)
-        # Strip medium information from query, Things like "CD1" and "disk 1"
-        # can also negate an otherwise positive result.
-        query = re.sub(r'(?i)\b(CD|disc)\s*\d+', '', query)
+        query = _normalize_query(query)
         tracks = []
         self._log.debug('Searching Tidal for track: {}', query)
         try:
-            data = self.session.search(query, models=[tidalapi.media.Track])
+            top_hit = self._search_track(query)
+        except ui.UserError:
+            raise
         except Exception as e:
             self._log.debug('Invalid Search Error: {}'.format(e))
-        if data.get('top_hit'):
-            id = data.get('top_hit').id
-            song_details = self.session.track(id)
+            return tracks
+        if top_hit:
+            song_details = self._cached_track(top_hit.id)
             song_info = self._get_track(song_details)
             tracks.append(song_info)
         return tracks
@@ -229,6 +588,8 @@ class TidalPlugin(BeetsPlugin):
             query = f'{release} {artist}'
         try:
             return self.get_albums(query)
+        except ui.UserError:
+            raise
         except Exception as e:
             self._log.debug('Tidal album search Error: {}'.format(e))
             return []
@@ -240,31 +601,52 @@ class TidalPlugin(BeetsPlugin):
         query = f'{title} {artist}'
         try:
             return self.get_tracks(query)
+        except ui.UserError:
+            raise
         except Exception as e:
             self._log.debug('Tidal track search Error: {}'.format(e))
             return []
 
-    def get_album_info(self, item):
-        """Returns an AlbumInfo object for a Tidal album.
+    def _cached_track(self, track_id):
+        """Return the TrackRecord for a Tidal track, checking the
+        in-memory and on-disk caches before querying Tidal.
         """
-        album = item.name.replace("&quot;", "\"")
-        tidal_album_id = item.id
-        artist_id = item.artist.id
-        year = item.year
-        popularity = item.popularity
-        explicit = item.explicit
-        if hasattr(item, 'isrc'):
-            isrc = item.isrc
-        else:
-            isrc = None
-        label = item.copyright
-        url = item.image(1280)
-        if self.is_valid_image_url(url):
-            cover_art_url = url
-        else:
-            cover_art_url = None
-        if item.release_date is not None:
-            releasedate = item.release_date
+        return self._track_cache(str(track_id))
+
+    def _cached_album(self, album_id):
+        """Return the AlbumRecord for a Tidal album, checking the
+        in-memory and on-disk caches before querying Tidal.
+        """
+        return self._album_cache(str(album_id))
+
+    def _fetch_track(self, track_id, refresh=False):
+        if not refresh:
+            cached = self._metadata_cache().get('track', track_id)
+            if cached is not None:
+                return TrackRecord.from_dict(*cached)
+        self._ensure_session()
+        record = self._track_record(self.session.track(track_id),
+                                    time.time())
+        self._metadata_cache().set('track', track_id, record.to_dict(),
+                                   record.fetched)
+        return record
+
+    def _fetch_album(self, album_id):
+        cached = self._metadata_cache().get('album', album_id)
+        if cached is not None:
+            return AlbumRecord.from_dict(*cached)
+        self._ensure_session()
+        record = self._album_record(self.session.album(album_id),
+                                    time.time())
+        self._metadata_cache().set('album', album_id, record.to_dict(),
+                                   record.fetched)
+        return record
+
+    def _album_record(self, item, fetched):
+        """Build an AlbumRecord from a tidalapi album fetched at `fetched`.
+        """
+        releasedate = getattr(item, 'release_date', None)
+        if releasedate is not None:
             # get year from a datetime object
             year = releasedate.year
             month = releasedate.month
@@ -273,57 +655,103 @@ class TidalPlugin(BeetsPlugin):
             year = None
             month = None
             day = None
-        artists = item.artist.name
-        all_tracks = self.session.album(tidal_album_id).tracks()
+        artist = item.artist
+        all_tracks = item.tracks()
+        return AlbumRecord(
+            id=item.id,
+            name=item.name,
+            artist_id=artist.id,
+            artist_name=artist.name,
+            year=year,
+            month=month,
+            day=day,
+            popularity=getattr(item, 'popularity', None),
+            explicit=getattr(item, 'explicit', None),
+            isrc=getattr(item, 'isrc', None) or None,
+            copyright=getattr(item, 'copyright', None),
+            image_url=item.image(1280),
+            tracks=tuple(self._track_record(track, fetched)
+                         for track in all_tracks),
+            fetched=fetched,
+        )
+
+    def _track_record(self, track_data, fetched):
+        """Build a TrackRecord from a tidalapi track fetched at `fetched`.
+        """
+        return TrackRecord(
+            id=track_data.id,
+            name=track_data.name,
+            duration=track_data.duration,
+            artist_id=track_data.artist.id,
+            artist_name=track_data.artist.name,
+            album_name=track_data.album.name,
+            isrc=track_data.isrc,
+            popularity=track_data.popularity,
+            fetched=fetched,
+        )
+
+    def get_album_info(self, item):
+        """Returns an AlbumInfo object for a Tidal AlbumRecord.
+        """
+        album = _decode(item.name)
+        tidal_album_id = item.id
+        artist_id = item.artist_id
+        url = item.image_url
+        if self.is_valid_image_url(url):
+            cover_art_url = url
+        else:
+            cover_art_url = None
         tracks = []
         medium_totals = collections.defaultdict(int)
-        for i, song in enumerate(all_tracks, start=1):
+        max_medium = None
+        for i, song in enumerate(item.tracks, start=1):
             track = self._get_track(song)
             track.index = i
             medium_totals[track.medium] += 1
+            if track.medium is not None and (max_medium is None
+                                             or track.medium > max_medium):
+                max_medium = track.medium
             tracks.append(track)
         for track in tracks:
             track.medium_total = medium_totals[track.medium]
         return AlbumInfo(album=album,
                          album_id=tidal_album_id,
                          tidal_album_id=tidal_album_id,
-                         artist=artists,
+                         artist=item.artist_name,
                          artist_id=artist_id,
                          tidal_artist_id=artist_id,
-                         tidal_alb_popularity=popularity,
-                         explicit=explicit,
-                         isrc=isrc,
+                         tidal_alb_popularity=item.popularity,
+                         explicit=item.explicit,
+                         isrc=item.isrc,
                          tracks=tracks,
-                         year=year,
-                         month=month,
-                         day=day,
-                         mediums=max(medium_totals.keys()),
+                         year=item.year,
+                         month=item.month,
+                         day=item.day,
+                         mediums=max_medium,
                          data_source=self.data_source,
                          cover_art_url=cover_art_url,
-                         label=label,
-                         tidal_updated=time.time(),
+                         label=item.copyright,
+                         tidal_updated=item.fetched,
                          )
 
     def _get_track(self, track_data):
-        """Convert a Tidal song object to a TrackInfo object.
+        """Convert a Tidal TrackRecord to a TrackInfo object.
         """
-        if track_data.duration:
-            length = track_data.duration
-        else:
-            length = None
+        tid = track_data.id
+        length = track_data.duration or None
         # Get track information for Tidal tracks
         return TrackInfo(
-            title=track_data.name.replace("&quot;", "\""),
-            track_id=track_data.id,
-            tidal_track_id=track_data.id,
-            artist=track_data.artist.name,
-            album=track_data.album.name.replace("&quot;", "\""),
-            tidal_artist_id=track_data.artist.id,
+            title=_decode(track_data.name),
+            track_id=tid,
+            tidal_track_id=tid,
+            artist=track_data.artist_name,
+            album=_decode(track_data.album_name),
+            tidal_artist_id=track_data.artist_id,
             length=length,
             data_source=self.data_source,
             isrc=track_data.isrc,
             tidal_track_popularity=track_data.popularity,
-            tidal_updated=time.time(),
+            tidal_updated=track_data.fetched,
         )
 
     def album_for_id(self, release_id):
@@ -333,7 +761,9 @@ class TidalPlugin(BeetsPlugin):
             release_id = release_id.split('/')[-1]
         self._log.debug('Searching for album {0}', release_id)
         try:
-            album_details = self.session.album(release_id)
+            album_details = self._cached_album(release_id)
+        except ui.UserError:
+            raise
         except Exception:
             return None
         return self.get_album_info(album_details)
@@ -345,16 +775,59 @@ class TidalPlugin(BeetsPlugin):
             track_id = track_id.split('/')[-1]
         self._log.debug('Searching for track {0}', track_id)
         try:
-            track_details = self.session.track(track_id)
+            track_details = self._cached_track(track_id)
+        except ui.UserError:
+            raise
         except Exception:
             return None
         return self._get_track(track_details)
 
     def is_valid_image_url(self, url):
+        """Check whether `url` points to an image. Results are remembered
+        for the rest of the run, except when the check failed because of a
+        network error.
+        """
+        if not url:
+            return False
         try:
-            response = requests.get(url)
-            Image.open(BytesIO(response.content))
-            return True
+            return self._validate_image(url)
+        except httpx.TransportError as e:
+            self._log.debug('Could not check image URL {}: {}', url, e)
+            return False
+
+    def _validate_image_uncached(self, url):
+        """Check whether `url` points to an image without downloading it.
+
+        A HEAD request is usually enough. If the server can't answer HEAD
+        or its headers are inconclusive, the image is streamed and abandoned
+        as soon as the headers show it is not an image; if they do, only the
+        first chunk is read to check its file signature.
+        """
+        http = self._http_client()
+        try:
+            response = http.head(url, timeout=3, follow_redirects=True)
+            content_type = response.headers.get('Content-Type', '')
+            if response.is_success and content_type.startswith('image/'):
+                return True
+            # 405 means the server doesn't support HEAD; any other client
+            # error is a definitive answer.
+            if response.is_client_error and response.status_code != 405:
+                self._log.debug('Invalid Image URL: {} ({})',
+                                url, response.status_code)
+                return False
+            with http.stream('GET', url,
+                             headers={'Range': 'bytes=0-4095'},
+                             follow_redirects=True) as response:
+                content_type = response.headers.get('Content-Type', '')
+                if (not response.is_success
+                        or not content_type.startswith('image/')):
+                    self._log.debug('Invalid Image URL: {} ({})',
+                                    url, content_type)
+                    return False
+                chunk = next(response.iter_bytes(4096))
+            return _looks_like_image(chunk)
+        except httpx.TransportError:
+            raise
         except Exception as e:
             self._log.debug('Invalid Image URL: {}'.format(e))
             return False
@@ -366,13 +839,14 @@ class TidalPlugin(BeetsPlugin):
             return None
         else:
             playlist_id = url.split('/')[-1]
+            self._ensure_session()
             playlist = tidalapi.playlist.Playlist(self.session, playlist_id)
             tracks = playlist.tracks()
             song_list = []
             for track in tracks:
                 # Find and store the song title
-                title = track.name.replace("&quot;", "\"")
-                album = track.album.name.replace("&quot;", "\"")
+                title = _decode(track.name)
+                album = _decode(track.album.name)
                 artist = track.artist.name
                 # Create a dictionary with the song information
                 song_dict = {"title": title.strip(),
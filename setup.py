@@ -13,8 +13,12 @@ setup(
     packages=['beetsplug'],
     install_requires=[
         'beets>=1.6.0',
-        'tidalapi',
+        'tidalapi>=0.8.0',
         'requests',
+        'httpx[http2]',
         'pillow',
     ],
+    extras_require={
+        'test': ['pytest'],
+    },
 )
@@ -0,0 +1,397 @@
+"""Tests for the Tidal plugin."""
+
+import json
+import sqlite3
+import time
+from io import BytesIO
+from types import SimpleNamespace
+from unittest import mock
+
+import httpx
+import pytest
+import requests
+from beets import config, ui
+from beets.library import Item, Library
+from PIL import Image
+from tidalapi.exceptions import TooManyRequests, http_error_to_tidal_error
+
+from beetsplug import tidal
+
+
+def make_track(track_id, popularity=50):
+    """Return an object shaped like a tidalapi track."""
+    return SimpleNamespace(
+        id=track_id, name=f'Track {track_id}', duration=200,
+        artist=SimpleNamespace(id=7, name='Artist'),
+        album=SimpleNamespace(name='Album'),
+        isrc='USABC0000001', popularity=popularity)
+
+
+def popularities(records):
+    return {track_id: record.popularity
+            for track_id, record in records.items()}
+
+
+@pytest.fixture
+def plugin(tmp_path, monkeypatch):
+    monkeypatch.setenv('BEETSDIR', str(tmp_path))
+    config.clear()
+    config._materialized = False
+    config.read(user=False, defaults=True)
+    config['tidal']['tidal_sleep_interval'] = [0, 0]
+    monkeypatch.setattr(tidal.time, 'sleep', mock.Mock())
+    plugin = tidal.TidalPlugin()
+    plugin.session = mock.Mock()
+    yield plugin
+    plugin.shutdown()
+
+
+def test_lookup_tracks_retries_after_429(plugin):
+    plugin.session.track.side_effect = [
+        TooManyRequests('Too many requests', retry_after=3),
+        make_track(1, popularity=42),
+    ]
+
+    assert popularities(plugin._lookup_tracks([1])) == {1: 42}
+    tidal.time.sleep.assert_called_once_with(3)
+
+
+def bad_gateway(track_id):
+    """Fail the way tidalapi does on a 502 with an HTML error page."""
+    response = requests.Response()
+    response.status_code = 502
+    response._content = b'<html><body>502 Bad Gateway</body></html>'
+    try:
+        response.raise_for_status()
+    except requests.HTTPError as e:
+        err = http_error_to_tidal_error(e)
+        raise err or e from e
+
+
+def test_lookup_tracks_retries_after_bad_gateway(plugin):
+    responses = iter([bad_gateway, lambda track_id: make_track(1, 42)])
+    plugin.session.track.side_effect = (
+        lambda track_id: next(responses)(track_id))
+
+    assert popularities(plugin._lookup_tracks([1])) == {1: 42}
+    tidal.time.sleep.assert_called_once()
+
+
+class LazyExecutor:
+    """A stand-in for ThreadPoolExecutor that runs each task when its
+    result is requested, recording submissions and runs in `events`.
+    """
+
+    def __init__(self, events):
+        self.events = events
+
+    def __call__(self, max_workers):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def submit(self, fn, *args):
+        self.events.append('submit')
+        future = mock.Mock()
+
+        def result():
+            self.events.append('run')
+            return fn(*args)
+        future.result = result
+        return future
+
+
+def test_lookup_tracks_adapts_wave_size(plugin, monkeypatch):
+    events = []
+    monkeypatch.setattr(tidal, 'ThreadPoolExecutor', LazyExecutor(events))
+    throttled = [TooManyRequests('Too many requests')]
+
+    def track(track_id):
+        if throttled:
+            raise throttled.pop()
+        return make_track(int(track_id))
+
+    plugin.session.track.side_effect = track
+
+    plugin._lookup_tracks(range(12), concurrency=4)
+
+    # Each wave is submitted in full before any of its results are read.
+    sizes = [chunk.count('submit') for chunk in
+             ' '.join(events).split('run') if 'submit' in chunk]
+    # Throttled at 4, halved to 2, then back up by one per clean wave.
+    assert sizes == [4, 2, 3, 4]
+
+
+def test_lookup_tracks_leaves_out_failed_lookups(plugin):
+    plugin.session.track.side_effect = lambda track_id: {
+        '1': make_track(1, popularity=42),
+    }[track_id]
+
+    assert popularities(plugin._lookup_tracks([1, 2])) == {1: 42}
+
+
+def test_track_popularity_refresh_bypasses_cache(plugin):
+    plugin.session.track.return_value = make_track(1, popularity=10)
+    assert plugin.track_popularity(1) == 10
+
+    plugin.session.track.return_value = make_track(1, popularity=20)
+    assert plugin.track_popularity(1) == 10
+    assert plugin.track_popularity(1, refresh=True) == 20
+    data, _ = plugin._metadata_cache().get('track', '1')
+    assert data['popularity'] == 20
+
+
+@pytest.fixture
+def failing_login(plugin, monkeypatch):
+    """Make the plugin's OAuth login time out."""
+    login = mock.Mock(side_effect=TimeoutError('login timed out'))
+    monkeypatch.setattr(tidal.tidalapi.Session, 'login_oauth_simple', login)
+    monkeypatch.setattr(plugin, 'load_session', lambda sfile: None)
+    plugin.session = None
+    return login
+
+
+def test_tidalsync_aborts_when_login_fails(plugin, failing_login,
+                                           monkeypatch):
+    monkeypatch.setattr(plugin, '_lookup_tracks', mock.Mock())
+    item = SimpleNamespace(tidal_track_id=1)
+
+    with pytest.raises(ui.UserError):
+        plugin.tidalsync(mock.Mock(), [item], False, True)
+    plugin._lookup_tracks.assert_not_called()
+
+
+def test_failed_login_is_raised_and_not_retried(plugin, failing_login):
+    with pytest.raises(ui.UserError):
+        plugin.candidates([], 'Artist', 'Album', False)
+    with pytest.raises(ui.UserError):
+        plugin.album_for_id('123')
+    assert failing_login.call_count == 1
+
+
+def test_corrupt_session_file_counts_as_no_session(plugin, tmp_path):
+    sessionfile = tmp_path / 'tidal.json'
+    sessionfile.write_text('{"token_type": ')
+    assert plugin.load_session(str(sessionfile)) is None
+
+    sessionfile.write_text('{}')
+    assert plugin.load_session(str(sessionfile)) is None
+
+
+def test_session_pool_fits_concurrent_lookups(plugin, monkeypatch):
+    session = tidal.tidalapi.Session()
+    monkeypatch.setattr(plugin, 'load_session', lambda sfile: session)
+    plugin.session = None
+
+    plugin._ensure_session()
+
+    adapter = session.request_session.get_adapter('https://api.tidal.com')
+    assert adapter._pool_maxsize >= tidal._POPULARITY_CONCURRENCY
+
+
+def test_image_check_is_not_cached_after_network_error(plugin):
+    responses = iter([
+        httpx.ConnectError('connection reset'),
+        httpx.Response(200, headers={'Content-Type': 'image/jpeg'}),
+    ])
+
+    def handler(request):
+        response = next(responses)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    plugin._http = httpx.Client(transport=httpx.MockTransport(handler))
+    url = 'https://resources.tidal.com/images/cover.jpg'
+
+    assert not plugin.is_valid_image_url(url)
+    assert plugin.is_valid_image_url(url)
+
+
+def png_prefix():
+    """Return the first 4 KB of a PNG that is larger than that."""
+    image = Image.effect_noise((128, 128), 100)
+    data = BytesIO()
+    image.save(data, format='PNG')
+    assert len(data.getvalue()) > 4096
+    return data.getvalue()[:4096]
+
+
+def test_image_check_sniffs_partial_png_when_head_unsupported(plugin):
+    def handler(request):
+        if request.method == 'HEAD':
+            return httpx.Response(405)
+        return httpx.Response(206, headers={'Content-Type': 'image/png'},
+                              content=png_prefix())
+
+    plugin._http = httpx.Client(transport=httpx.MockTransport(handler))
+
+    assert plugin.is_valid_image_url('https://example.com/cover.png')
+
+
+def jpeg_prefix():
+    """Return the first 4 KB of a JPEG whose header segments are longer
+    than that.
+    """
+    data = BytesIO()
+    Image.new('RGB', (64, 64)).save(data, format='JPEG',
+                                    icc_profile=b'\0' * 10000)
+    return data.getvalue()[:4096]
+
+
+def test_image_check_accepts_jpeg_with_long_header(plugin):
+    def handler(request):
+        if request.method == 'HEAD':
+            return httpx.Response(405)
+        return httpx.Response(206, headers={'Content-Type': 'image/jpeg'},
+                              content=jpeg_prefix())
+
+    plugin._http = httpx.Client(transport=httpx.MockTransport(handler))
+
+    assert plugin.is_valid_image_url('https://example.com/cover.jpg')
+
+
+def test_image_check_rejects_non_image_body(plugin):
+    def handler(request):
+        if request.method == 'HEAD':
+            return httpx.Response(405)
+        return httpx.Response(200, headers={'Content-Type': 'image/jpeg'},
+                              content=b'<html>Not found</html>')
+
+    plugin._http = httpx.Client(transport=httpx.MockTransport(handler))
+
+    assert not plugin.is_valid_image_url('https://example.com/cover.jpg')
+
+
+def test_image_check_trusts_head_not_found(plugin):
+    handler = mock.Mock(return_value=httpx.Response(404))
+    plugin._http = httpx.Client(transport=httpx.MockTransport(handler))
+
+    assert not plugin.is_valid_image_url('https://example.com/cover.jpg')
+    assert handler.call_count == 1
+
+
+def test_plugin_load_opens_no_resources(plugin, tmp_path):
+    assert plugin._http is None
+    assert plugin._cache is None
+    assert not (tmp_path / 'tidal_cache.db').exists()
+
+
+def test_metadata_cache_drops_expired_records_on_open(tmp_path, monkeypatch):
+    path = str(tmp_path / 'cache.db')
+    cache = tidal.MetadataCache(path, ttl=60)
+    cache.set('track', '1', {'popularity': 1}, time.time())
+    cache.close()
+
+    monkeypatch.setattr(tidal.time, 'time', lambda: 1e12)
+    cache = tidal.MetadataCache(path, ttl=60)
+    count, = cache._db.execute('SELECT COUNT(*) FROM metadata').fetchone()
+    cache.close()
+    assert count == 0
+
+
+def test_lookup_tracks_gives_up_after_tidal_attempts(plugin):
+    config['tidal']['tidal_attempts'] = 3
+    plugin.session.track.side_effect = TooManyRequests('Too many requests')
+
+    assert plugin._lookup_tracks([1, 2]) == {}
+    assert tidal.time.sleep.call_count == 2
+    # Both IDs are tried in each of the three attempts.
+    assert plugin.session.track.call_count == 6
+
+
+def test_metadata_cache_expires_records(tmp_path, monkeypatch):
+    cache = tidal.MetadataCache(str(tmp_path / 'cache.db'), ttl=60)
+    cache.set('track', '1', {'popularity': 1}, 1000.0)
+
+    monkeypatch.setattr(tidal.time, 'time', lambda: 1059.0)
+    assert cache.get('track', '1') == ({'popularity': 1}, 1000.0)
+    assert cache.get('album', '1') is None
+    monkeypatch.setattr(tidal.time, 'time', lambda: 1060.0)
+    assert cache.get('track', '1') is None
+    cache.close()
+
+
+def test_album_record_round_trip():
+    track = tidal.TrackRecord(
+        id=1, name='Track', duration=200, artist_id=7, artist_name='Artist',
+        album_name='Album', isrc='USABC0000001', popularity=50,
+        fetched=1000.0)
+    album = tidal.AlbumRecord(
+        id=3, name='Album', artist_id=7, artist_name='Artist', year=2020,
+        month=1, day=2, popularity=60, explicit=False, isrc=None,
+        copyright='Label', image_url='https://example.com/cover.jpg',
+        tracks=(track,), fetched=1000.0)
+
+    data = json.loads(json.dumps(album.to_dict()))
+
+    assert 'fetched' not in data
+    assert tidal.AlbumRecord.from_dict(data, 1000.0) == album
+
+
+def test_tidalsync_stores_only_successful_lookups(plugin, tmp_path):
+    lib = Library(str(tmp_path / 'library.db'))
+    found = Item(title='found', tidal_track_id=1)
+    missing = Item(title='missing', tidal_track_id=2)
+    present = Item(title='present', tidal_track_id=3,
+                   tidal_track_popularity=5)
+    untagged = Item(title='untagged')
+    for item in (found, missing, present, untagged):
+        lib.add(item)
+    plugin.session.track.side_effect = lambda track_id: {
+        '1': make_track(1, popularity=42),
+        '3': make_track(3, popularity=99),
+    }[track_id]
+
+    plugin.tidalsync(lib, lib.items(), False, False)
+
+    # Read the results back over a fresh connection to check that they
+    # were committed.
+    items = {item.title: item
+             for item in Library(str(tmp_path / 'library.db')).items()}
+    assert int(items['found'].tidal_track_popularity) == 42
+    assert 'tidal_updated' in items['found']
+    assert 'tidal_track_popularity' not in items['missing']
+    assert 'tidal_updated' not in items['missing']
+    assert int(items['present'].tidal_track_popularity) == 5
+    assert plugin.session.track.call_count == 2
+
+
+def test_metadata_cache_batches_writes(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    cache = tidal.MetadataCache(path, ttl=60, flush_size=3)
+    now = time.time()
+
+    def stored():
+        with sqlite3.connect(path) as db:
+            return db.execute('SELECT COUNT(*) FROM metadata').fetchone()[0]
+
+    cache.set('track', '1', {'popularity': 1}, now)
+    cache.set('track', '2', {'popularity': 2}, now)
+    assert stored() == 0
+    assert cache.get('track', '1') == ({'popularity': 1}, now)
+
+    cache.set('track', '3', {'popularity': 3}, now)
+    assert stored() == 3
+
+    cache.set('track', '4', {'popularity': 4}, now)
+    cache.close()
+    assert stored() == 4
+
+
+def test_tidalsync_records_when_cached_data_was_fetched(plugin, tmp_path):
+    lib = Library(str(tmp_path / 'library.db'))
+    lib.add(Item(title='cached', tidal_track_id=1))
+    fetched = time.time() - 3600
+    record = plugin._track_record(make_track(1, popularity=42), fetched)
+    plugin._metadata_cache().set('track', '1', record.to_dict(), fetched)
+
+    plugin.tidalsync(lib, lib.items(), False, False)
+
+    item, = lib.items()
+    assert float(item.tidal_updated) == pytest.approx(fetched)
+    plugin.session.track.assert_not_called()